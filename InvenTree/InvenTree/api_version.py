@@ -2,11 +2,15 @@
 
 
 # InvenTree API version
-INVENTREE_API_VERSION = 94
+INVENTREE_API_VERSION = 95
 
 """
 Increment this API version number whenever there is a significant change to the API that any clients need to know about
 
+v95 -> 2026-10-15
+    - The 'issued_by_detail' and 'responsible_detail' fields of the BuildOrder list API are now optional
+    - These fields must be requested with the 'issued_by_detail' and 'responsible_detail' query parameters
+
 v94 -> 2023-02-10 : https://github.com/inventree/InvenTree/pull/4327
     - Adds API endpoints for the "Group" auth model
 
@@ -121,7 +121,15 @@ class BuildList(APIDownloadMixin, ListCreateAPI):
 
     def get_queryset(self):
         """Override the queryset filtering, as some of the fields don't natively play nicely with DRF."""
-        queryset = super().get_queryset().select_related('part')
+        queryset = super().get_queryset()
+
+        params = self.request.query_params
+
+        queryset = build.serializers.BuildSerializer.setup_eager_loading(
+            queryset,
+            issued_by_detail=str2bool(params.get('issued_by_detail', None)),
+            responsible_detail=str2bool(params.get('responsible_detail', None)),
+        )
 
         queryset = build.serializers.BuildSerializer.annotate_queryset(queryset)
 
@@ -203,11 +211,13 @@ class BuildList(APIDownloadMixin, ListCreateAPI):
     def get_serializer(self, *args, **kwargs):
         """Add extra context information to the endpoint serializer."""
         try:
-            part_detail = str2bool(self.request.GET.get('part_detail', None))
-        except AttributeError:
-            part_detail = None
+            params = self.request.query_params
 
-        kwargs['part_detail'] = part_detail
+            kwargs['part_detail'] = str2bool(params.get('part_detail', None))
+            kwargs['issued_by_detail'] = str2bool(params.get('issued_by_detail', None))
+            kwargs['responsible_detail'] = str2bool(params.get('responsible_detail', None))
+        except AttributeError:
+            pass
 
         return self.serializer_class(*args, **kwargs)
 
@@ -218,6 +228,14 @@ class BuildDetail(RetrieveUpdateDestroyAPI):
     queryset = Build.objects.all()
     serializer_class = build.serializers.BuildSerializer
 
+    def get_queryset(self):
+        """Prefetch related fields for the BuildSerializer"""
+        queryset = super().get_queryset()
+
+        queryset = build.serializers.BuildSerializer.setup_eager_loading(queryset)
+
+        return queryset
+
     def destroy(self, request, *args, **kwargs):
         """Only allow deletion of a BuildOrder if the build status is CANCELLED"""
 
@@ -358,6 +376,14 @@ class BuildItemDetail(RetrieveUpdateDestroyAPI):
     queryset = BuildItem.objects.all()
     serializer_class = build.serializers.BuildItemSerializer
 
+    def get_queryset(self):
+        """Prefetch related fields for the BuildItemSerializer"""
+        queryset = super().get_queryset()
+
+        queryset = build.serializers.BuildItemSerializer.setup_eager_loading(queryset)
+
+        return queryset
+
 
 class BuildItemList(ListCreateAPI):
     """API endpoint for accessing a list of BuildItem objects.
@@ -386,15 +412,10 @@ class BuildItemList(ListCreateAPI):
         """Override the queryset method, to allow filtering by stock_item.part."""
         queryset = BuildItem.objects.all()
 
-        queryset = queryset.select_related(
-            'bom_item',
-            'bom_item__sub_part',
-            'build',
-            'install_into',
-            'stock_item',
-            'stock_item__location',
-            'stock_item__part',
-        )
+        queryset = build.serializers.BuildItemSerializer.setup_eager_loading(queryset)
+
+        # Do not load related fields which are not going to be serialized
+        queryset = queryset.defer(*self.get_serializer().get_deferred_fields())
 
         return queryset
 
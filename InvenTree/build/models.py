@@ -8,7 +8,7 @@ from datetime import datetime
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Sum, Q
 from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save
@@ -352,7 +352,7 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
     def has_tracked_bom_items(self):
         """Returns True if this BuildOrder has trackable BomItems."""
-        return self.tracked_bom_items.count() > 0
+        return self.tracked_bom_items.exists()
 
     @property
     def untracked_bom_items(self):
@@ -364,7 +364,7 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
     def has_untracked_bom_items(self):
         """Returns True if this BuildOrder has non trackable BomItems."""
-        return self.untracked_bom_items.count() > 0
+        return self.untracked_bom_items.exists()
 
     @property
     def remaining(self):
@@ -378,7 +378,7 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
     def has_build_outputs(self):
         """Returns True if this build has more than zero build outputs"""
-        return self.output_count > 0
+        return self.build_outputs.exists()
 
     def get_build_outputs(self, **kwargs):
         """Return a list of build outputs.
@@ -419,12 +419,9 @@ class Build(MPTTModel, ReferenceIndexingMixin):
     @property
     def complete_count(self):
         """Return the total quantity of completed outputs"""
-        quantity = 0
+        quantity = self.complete_outputs.aggregate(quantity=Sum('quantity'))['quantity']
 
-        for output in self.complete_outputs:
-            quantity += output.quantity
-
-        return quantity
+        return quantity or 0
 
     @property
     def incomplete_outputs(self):
@@ -436,12 +433,13 @@ class Build(MPTTModel, ReferenceIndexingMixin):
     @property
     def incomplete_count(self):
         """Return the total number of "incomplete" outputs."""
-        quantity = 0
+        quantity = self.incomplete_outputs.aggregate(quantity=Sum('quantity'))['quantity']
 
-        for output in self.incomplete_outputs:
-            quantity += output.quantity
+        return quantity or 0
 
-        return quantity
+    def has_incomplete_outputs(self):
+        """Returns True if this build has any incomplete build outputs"""
+        return self.incomplete_outputs.exists()
 
     @classmethod
     def getNextBuildNumber(cls):
@@ -486,11 +484,13 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
         - Must not have any outstanding build outputs
         - 'completed' value must meet (or exceed) the 'quantity' value
+
+        Checks which do not require a database query are performed first.
         """
-        if self.incomplete_count > 0:
+        if self.remaining > 0:
             return False
 
-        if self.remaining > 0:
+        if self.has_incomplete_outputs():
             return False
 
         if not self.are_untracked_parts_allocated():
@@ -502,13 +502,13 @@ class Build(MPTTModel, ReferenceIndexingMixin):
     @transaction.atomic
     def complete_build(self, user):
         """Mark this build as complete."""
-        if self.incomplete_count > 0:
+        if self.has_incomplete_outputs():
             return
 
         self.completion_date = datetime.now().date()
         self.completed_by = user
         self.status = BuildStatus.COMPLETE
-        self.save()
+        self.save(update_fields=['completion_date', 'completed_by', 'status'])
 
         # Remove untracked allocated stock
         self.subtract_allocated_stock(user)
@@ -571,12 +571,14 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         remove_incomplete_outputs = kwargs.get('remove_incomplete_outputs', False)
 
         # Handle stock allocations
-        for build_item in self.allocated_stock.all():
-
-            if remove_allocated_stock:
+        if remove_allocated_stock:
+            # Stock items are not joined here: allocations which share a stock item
+            # must each see the quantity saved by the previous allocation
+            for build_item in self.allocated_stock.select_related('install_into'):
                 build_item.complete_allocation(user)
 
-            build_item.delete()
+        # Remove all stock allocations in a single query
+        self.allocated_stock.all().delete()
 
         # Remove incomplete outputs (if required)
         if remove_incomplete_outputs:
@@ -590,10 +592,44 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         self.completed_by = user
 
         self.status = BuildStatus.CANCELLED
-        self.save()
+        self.save(update_fields=['completion_date', 'completed_by', 'status'])
 
         trigger_event('build.cancelled', id=self.pk)
 
+    @transaction.atomic
+    def create_allocations(self, allocations):
+        """Create new BuildItem objects against this build in bulk.
+
+        The allocations must already have been validated, as bulk_create() bypasses BuildItem.save().
+        It also bypasses the post_save signal, so this is sent for each new BuildItem
+        (to ensure that plugin events are still triggered).
+
+        Args:
+            allocations: List of (unsaved) BuildItem objects
+        """
+        if not allocations:
+            return
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            created = BuildItem.objects.bulk_create(allocations, batch_size=500)
+        else:
+            # The database backend does not return primary keys from a bulk insert
+            existing = list(self.allocated_stock.values_list('pk', flat=True))
+
+            BuildItem.objects.bulk_create(allocations, batch_size=500)
+
+            created = self.allocated_stock.exclude(pk__in=existing)
+
+        for item in created:
+            post_save.send(
+                sender=BuildItem,
+                instance=item,
+                created=True,
+                raw=False,
+                using=BuildItem.objects.db,
+                update_fields=None,
+            )
+
     @transaction.atomic
     def unallocateStock(self, bom_item=None, output=None):
         """Unallocate stock from this Build.
@@ -651,6 +687,19 @@ class Build(MPTTModel, ReferenceIndexingMixin):
             # Quantity *must* be an integer at this point!
             quantity = int(quantity)
 
+            # Automatic allocations are collected and created in bulk
+            allocations = []
+
+            # Determine the valid parts for each trackable BOM item once,
+            # rather than re-querying the BOM for every build output
+            trackable_bom_items = []
+
+            if auto_allocate and serials:
+                bom_items = self.part.get_trackable_parts().prefetch_related('substitutes__part')
+
+                for bom_item in bom_items:
+                    trackable_bom_items.append((bom_item, bom_item.get_valid_parts_for_allocation()))
+
             for ii in range(quantity):
 
                 if serials:
@@ -670,11 +719,8 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
                 if auto_allocate and serial is not None:
 
-                    # Get a list of BomItem objects which point to "trackable" parts
-
-                    for bom_item in self.part.get_trackable_parts():
-
-                        parts = bom_item.get_valid_parts_for_allocation()
+                    # Iterate through BomItem objects which point to "trackable" parts
+                    for bom_item, parts in trackable_bom_items:
 
                         items = StockModels.StockItem.objects.filter(
                             part__in=parts,
@@ -682,14 +728,17 @@ class Build(MPTTModel, ReferenceIndexingMixin):
                             quantity=1,
                         ).filter(StockModels.StockItem.IN_STOCK_FILTER)
 
+                        # Fetching two rows is enough to determine if the match is unique
+                        items = list(items[:2])
+
                         """
                         Test if there is a matching serial number!
                         """
-                        if items.exists() and items.count() == 1:
+                        if len(items) == 1:
                             stock_item = items[0]
 
                             # Allocate the stock item
-                            BuildItem.objects.create(
+                            allocation = BuildItem(
                                 build=self,
                                 bom_item=bom_item,
                                 stock_item=stock_item,
@@ -697,6 +746,12 @@ class Build(MPTTModel, ReferenceIndexingMixin):
                                 install_into=output,
                             )
 
+                            # bulk_create() bypasses save(), so validate here
+                            allocation.clean(valid_parts=parts)
+                            allocations.append(allocation)
+
+            self.create_allocations(allocations)
+
         else:
             """Create a single build output of the given quantity."""
 
@@ -771,9 +826,21 @@ class Build(MPTTModel, ReferenceIndexingMixin):
             stock_item__part__trackable=False
         )
 
+        # Consolidate the allocated quantity against each stock item,
+        # so that each stock item is only adjusted (and tracked) once
+        consumed = {}
+
+        for item in items.select_related('stock_item', 'stock_item__part'):
+            stock_item, quantity = consumed.get(item.stock_item.pk, (item.stock_item, 0))
+            consumed[stock_item.pk] = (stock_item, quantity + item.quantity)
+
         # Remove stock
-        for item in items:
-            item.complete_allocation(user)
+        for stock_item, quantity in consumed.values():
+            stock_item.take_stock(
+                quantity,
+                user,
+                code=StockHistoryCode.BUILD_CONSUMED
+            )
 
         # Delete allocation
         items.all().delete()
@@ -793,7 +860,8 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         # List the allocated BuildItem objects for the given output
         allocated_items = output.items_to_install.all()
 
-        for build_item in allocated_items:
+        # Stock items are not joined, as multiple allocations may share a stock item
+        for build_item in allocated_items.select_related('install_into'):
             # Complete the allocation of stock for that item
             build_item.complete_allocation(user)
 
@@ -986,6 +1054,25 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
         return allocated['q']
 
+    def allocated_quantities(self, output=None):
+        """Return the total quantity allocated against each BomItem for a given build output.
+
+        All allocations are summed in a single database query,
+        rather than performing a separate query for each BomItem.
+
+        Args:
+            output: Build output (StockItem), or None for "untracked" allocations
+
+        Returns:
+            dict: Allocated quantity, keyed by BomItem pk (BomItems with no allocations are omitted)
+        """
+        allocations = BuildItem.objects.filter(
+            build=self,
+            install_into=output,
+        ).values('bom_item').annotate(allocated=Sum('quantity'))
+
+        return {row['bom_item']: row['allocated'] for row in allocations}
+
     def unallocated_quantity(self, bom_item, output=None):
         """Return the total unallocated (remaining) quantity of a part against a particular output."""
         required = self.required_quantity(bom_item, output)
@@ -993,14 +1080,23 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
         return max(required - allocated, 0)
 
-    def is_bom_item_allocated(self, bom_item, output=None):
-        """Test if the supplied BomItem has been fully allocated"""
+    def is_bom_item_allocated(self, bom_item, output=None, allocations=None):
+        """Test if the supplied BomItem has been fully allocated
+
+        Args:
+            bom_item: The BomItem object
+            output: Build output (StockItem)
+            allocations: Pre-calculated allocated quantities (see allocated_quantities). If not provided, the database is queried.
+        """
 
         if bom_item.consumable:
             # Consumable BOM items do not need to be allocated
             return True
 
-        return self.unallocated_quantity(bom_item, output) == 0
+        if allocations is None:
+            return self.unallocated_quantity(bom_item, output) == 0
+
+        return allocations.get(bom_item.pk, 0) >= self.required_quantity(bom_item, output)
 
     def is_fully_allocated(self, output):
         """Returns True if the particular build output is fully allocated."""
@@ -1010,9 +1106,11 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         else:
             bom_items = self.tracked_bom_items
 
+        allocations = self.allocated_quantities(output)
+
         for bom_item in bom_items:
 
-            if not self.is_bom_item_allocated(bom_item, output):
+            if not self.is_bom_item_allocated(bom_item, output, allocations=allocations):
                 return False
 
         # All parts must be fully allocated!
@@ -1026,12 +1124,13 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         else:
             bom_items = self.tracked_bom_items
 
-        for bom_item in bom_items:
+        allocations = self.allocated_quantities(output)
 
-            if self.allocated_quantity(bom_item, output) > 0:
-                return True
+        if not allocations:
+            # Nothing is allocated, no need to look at the BOM
+            return False
 
-        return False
+        return any(allocations.get(bom_item.pk, 0) > 0 for bom_item in bom_items)
 
     def are_untracked_parts_allocated(self):
         """Returns True if the un-tracked parts are fully allocated for this BuildOrder."""
@@ -1045,11 +1144,13 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
         bom_items = self.tracked_bom_items if output else self.untracked_bom_items
 
-        for bom_item in bom_items:
-            if self.allocated_quantity(bom_item, output) > self.required_quantity(bom_item, output):
-                return True
+        allocations = self.allocated_quantities(output)
+
+        if not allocations:
+            # Nothing is allocated, so nothing can be over-allocated
+            return False
 
-        return False
+        return any(allocations.get(bom_item.pk, 0) > self.required_quantity(bom_item, output) for bom_item in bom_items)
 
     def unallocated_bom_items(self, output):
         """Return a list of bom items which have *not* been fully allocated against a particular output."""
@@ -1061,9 +1162,11 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         else:
             bom_items = self.tracked_bom_items
 
+        allocations = self.allocated_quantities(output)
+
         for bom_item in bom_items:
 
-            if not self.is_bom_item_allocated(bom_item, output):
+            if not self.is_bom_item_allocated(bom_item, output, allocations=allocations):
                 unallocated.append(bom_item)
 
         return unallocated
@@ -1086,9 +1189,11 @@ class Build(MPTTModel, ReferenceIndexingMixin):
         """
         parts = []
 
+        allocated = self.allocated_quantities()
+
         for bom_item in self.bom_items:
             # Get remaining quantity needed
-            required_quantity_to_complete_build = self.remaining * bom_item.quantity - self.allocated_quantity(bom_item)
+            required_quantity_to_complete_build = self.remaining * bom_item.quantity - allocated.get(bom_item.pk, 0)
             # Compare to net stock
             if bom_item.sub_part.net_stock < required_quantity_to_complete_build:
                 parts.append(bom_item.sub_part)
@@ -1101,7 +1206,7 @@ class Build(MPTTModel, ReferenceIndexingMixin):
 
         An active build is either:
         - PENDING
-        - HOLDING
+        - PRODUCTION
         """
         return self.status in BuildStatus.ACTIVE_CODES
 
@@ -1170,12 +1275,15 @@ class BuildItem(models.Model):
 
         super().save()
 
-    def clean(self):
+    def clean(self, valid_parts=None):
         """Check validity of this BuildItem instance.
 
         The following checks are performed:
         - StockItem.part must be in the BOM of the Part object referenced by Build
         - Allocation quantity cannot exceed available quantity
+
+        Arguments:
+            valid_parts: Pre-calculated list of valid parts for the assigned BomItem (see BomItem.get_valid_parts_for_allocation). If not provided, this is calculated as required.
         """
         self.validate_unique()
 
@@ -1242,12 +1350,18 @@ class BuildItem(models.Model):
                 iii) The Part referenced by the StockItem is a valid substitute for the BomItem
             """
 
+            if valid_parts is None:
+                check_stock_item = self.bom_item.is_stock_item_valid
+            else:
+                def check_stock_item(stock_item):
+                    return stock_item.part in valid_parts
+
             if self.build.part == self.bom_item.part:
-                bom_item_valid = self.bom_item.is_stock_item_valid(self.stock_item)
+                bom_item_valid = check_stock_item(self.stock_item)
 
             elif self.bom_item.inherited:
                 if self.build.part in self.bom_item.part.get_descendants(include_self=False):
-                    bom_item_valid = self.bom_item.is_stock_item_valid(self.stock_item)
+                    bom_item_valid = check_stock_item(self.stock_item)
 
         # If the existing BomItem is *not* valid, try to find a match
         if not bom_item_valid:
@@ -17,6 +17,7 @@ import InvenTree.helpers
 from InvenTree.serializers import InvenTreeDecimalField
 from InvenTree.status_codes import StockStatus
 
+import stock.filters
 from stock.models import StockItem, StockLocation
 from stock.serializers import StockItemSerializerBrief, LocationSerializer
 
@@ -43,6 +44,27 @@ class BuildSerializer(InvenTreeModelSerializer):
 
     responsible_detail = OwnerSerializer(source='responsible', read_only=True)
 
+    @staticmethod
+    def setup_eager_loading(queryset, issued_by_detail=True, responsible_detail=True):
+        """Prefetch related fields against the provided queryset, to avoid per-row database hits
+
+        Related fields which are only rendered as detail fields are only joined when requested.
+        """
+        queryset = queryset.select_related('part')
+
+        if issued_by_detail:
+            queryset = queryset.select_related('issued_by')
+
+        if responsible_detail:
+            queryset = queryset.select_related(
+                'responsible',
+                'responsible__owner_type',
+            )
+
+            queryset = queryset.prefetch_related('responsible__owner')
+
+        return queryset
+
     @staticmethod
     def annotate_queryset(queryset):
         """Add custom annotations to the BuildSerializer queryset, performing database queries as efficiently as possible.
@@ -67,12 +89,20 @@ class BuildSerializer(InvenTreeModelSerializer):
     def __init__(self, *args, **kwargs):
         """Determine if extra serializer fields are required"""
         part_detail = kwargs.pop('part_detail', True)
+        issued_by_detail = kwargs.pop('issued_by_detail', True)
+        responsible_detail = kwargs.pop('responsible_detail', True)
 
         super().__init__(*args, **kwargs)
 
         if part_detail is not True:
             self.fields.pop('part_detail')
 
+        if issued_by_detail is not True:
+            self.fields.pop('issued_by_detail')
+
+        if responsible_detail is not True:
+            self.fields.pop('responsible_detail')
+
     reference = serializers.CharField(required=True)
 
     def validate_reference(self, reference):
@@ -562,7 +592,7 @@ class BuildCompleteSerializer(serializers.Serializer):
         """Perform validation of this serializer prior to saving"""
         build = self.context['build']
 
-        if build.incomplete_count > 0:
+        if build.has_incomplete_outputs():
             raise ValidationError(_("Build order has incomplete outputs"))
 
         return data
@@ -657,7 +687,10 @@ class BuildAllocationItemSerializer(serializers.Serializer):
         return bom_item
 
     stock_item = serializers.PrimaryKeyRelatedField(
-        queryset=StockItem.objects.all(),
+        # Annotate the allocated quantity, to avoid extra queries when validating each item
+        queryset=StockItem.objects.annotate(
+            allocated=stock.filters.annotate_allocated_quantity(),
+        ),
         many=False,
         allow_null=False,
         required=True,
@@ -718,7 +751,7 @@ class BuildAllocationItemSerializer(serializers.Serializer):
         # Note: Because of allow_variants options, it may not be a direct match!
 
         # Check that the quantity does not exceed the available amount from the stock item
-        q = stock_item.unallocated_quantity()
+        q = max(stock_item.quantity - stock_item.allocated, 0)
 
         if quantity > q:
 
@@ -768,6 +801,16 @@ class BuildAllocationSerializer(serializers.Serializer):
         if len(items) == 0:
             raise ValidationError(_('Allocation items must be provided'))
 
+        # Cache the valid parts for each BomItem (to be used in the "save" method),
+        # so that they are only calculated once, no matter how many items are allocated
+        self.valid_parts = {}
+
+        for item in items:
+            bom_item = item['bom_item']
+
+            if bom_item.pk not in self.valid_parts:
+                self.valid_parts[bom_item.pk] = bom_item.get_valid_parts_for_allocation()
+
         return data
 
     def save(self):
@@ -778,29 +821,66 @@ class BuildAllocationSerializer(serializers.Serializer):
 
         build = self.context['build']
 
-        with transaction.atomic():
-            for item in items:
-                bom_item = item['bom_item']
-                stock_item = item['stock_item']
-                quantity = item['quantity']
-                output = item.get('output', None)
-
-                # Ignore allocation for consumable BOM items
-                if bom_item.consumable:
-                    continue
-
-                try:
-                    # Create a new BuildItem to allocate stock
-                    BuildItem.objects.create(
-                        build=build,
-                        bom_item=bom_item,
-                        stock_item=stock_item,
-                        quantity=quantity,
-                        install_into=output
-                    )
-                except (ValidationError, DjangoValidationError) as exc:
-                    # Catch model errors and re-throw as DRF errors
-                    raise ValidationError(detail=serializers.as_serializer_error(exc))
+        # New BuildItem objects are validated individually, and then created in bulk
+        allocations = []
+
+        # The checks performed by the model cannot see allocations which have not yet been saved, so keep track of:
+        # - (stock_item, output) pairs which are to be allocated
+        # - The total quantity to be allocated from each stock item
+        allocated_outputs = set()
+        allocated_quantity = {}
+
+        for item in items:
+            bom_item = item['bom_item']
+            stock_item = item['stock_item']
+            quantity = item['quantity']
+            output = item.get('output', None)
+
+            # Ignore allocation for consumable BOM items
+            if bom_item.consumable:
+                continue
+
+            # Allocations which already exist are checked by BuildAllocationItemSerializer,
+            # duplicates within this request are only rejected against a build output
+            if output is not None:
+                key = (stock_item.pk, output.pk)
+
+                if key in allocated_outputs:
+                    raise ValidationError(_('This stock item has already been allocated to this build output'))
+
+                allocated_outputs.add(key)
+
+            # Check that the total quantity does not exceed the available amount from the stock item
+            allocated_quantity[stock_item.pk] = allocated_quantity.get(stock_item.pk, 0) + quantity
+
+            available = max(stock_item.quantity - stock_item.allocated, 0)
+
+            if allocated_quantity[stock_item.pk] > available:
+
+                q = InvenTree.helpers.clean_decimal(available)
+
+                raise ValidationError({
+                    'quantity': _(f"Available quantity ({q}) exceeded")
+                })
+
+            # Create a new BuildItem to allocate stock
+            allocation = BuildItem(
+                build=build,
+                bom_item=bom_item,
+                stock_item=stock_item,
+                quantity=quantity,
+                install_into=output
+            )
+
+            try:
+                allocation.clean(valid_parts=self.valid_parts.get(bom_item.pk, None))
+            except (ValidationError, DjangoValidationError) as exc:
+                # Catch model errors and re-throw as DRF errors
+                raise ValidationError(detail=serializers.as_serializer_error(exc))
+
+            allocations.append(allocation)
+
+        build.create_allocations(allocations)
 
 
 class BuildAutoAllocationSerializer(serializers.Serializer):
@@ -882,6 +962,24 @@ class BuildItemSerializer(InvenTreeModelSerializer):
 
     quantity = InvenTreeDecimalField()
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch related fields against the provided queryset, to avoid per-row database hits"""
+        queryset = queryset.select_related(
+            'bom_item',
+            'bom_item__sub_part',
+            'build',
+            'build__part',
+            'build__issued_by',
+            'build__responsible',
+            'install_into',
+            'stock_item',
+            'stock_item__location',
+            'stock_item__part',
+        )
+
+        return queryset
+
     def __init__(self, *args, **kwargs):
         """Determine which extra details fields should be included"""
         build_detail = kwargs.pop('build_detail', False)
@@ -903,6 +1001,26 @@ class BuildItemSerializer(InvenTreeModelSerializer):
         if not stock_detail:
             self.fields.pop('stock_item_detail')
 
+    def get_deferred_fields(self):
+        """Return a list of related fields which are not rendered by this serializer instance.
+
+        These (potentially large) fields can be deferred when loading the queryset,
+        reducing the amount of data fetched from the database for each row.
+        """
+        deferred = [
+            'bom_item__sub_part__notes',
+            'build__part__notes',
+            'stock_item__notes',
+        ]
+
+        if 'build_detail' not in self.fields:
+            deferred.append('build__notes')
+
+        if 'part_detail' not in self.fields:
+            deferred.append('stock_item__part__notes')
+
+        return deferred
+
     class Meta:
         """Serializer metaclass"""
         model = BuildItem
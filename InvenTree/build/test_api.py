@@ -724,6 +724,55 @@ class BuildAllocationTest(BuildAPITest):
         self.assertEqual(allocation.bom_item.pk, 1)
         self.assertEqual(allocation.stock_item.pk, 2)
 
+    def test_duplicate_items(self):
+        """Test allocation of the same stock item multiple times in a single request."""
+        # The total allocated quantity cannot exceed the available quantity
+        data = self.post(
+            self.url,
+            {
+                "items": [
+                    {
+                        "bom_item": 1,
+                        "stock_item": 2,
+                        "quantity": 3000,
+                    },
+                    {
+                        "bom_item": 1,
+                        "stock_item": 2,
+                        "quantity": 3000,
+                    }
+                ]
+            },
+            expected_code=400
+        ).data
+
+        self.assertIn('Available quantity', str(data))
+
+        # No BuildItem objects have been created
+        self.assertEqual(self.n, BuildItem.objects.count())
+
+        # Untracked stock (no build output) may be allocated multiple times
+        self.post(
+            self.url,
+            {
+                "items": [
+                    {
+                        "bom_item": 1,
+                        "stock_item": 2,
+                        "quantity": 100,
+                    },
+                    {
+                        "bom_item": 1,
+                        "stock_item": 2,
+                        "quantity": 200,
+                    }
+                ]
+            },
+            expected_code=201
+        )
+
+        self.assertEqual(self.n + 2, BuildItem.objects.count())
+
 
 class BuildOverallocationTest(BuildAPITest):
     """Unit tests for over allocation of stock items against a build order.
@@ -847,6 +896,25 @@ class BuildListTest(BuildAPITest):
         builds = self.get(self.url, data={'overdue': True})
         self.assertEqual(len(builds.data), 0)
 
+    def test_detail_fields(self):
+        """Nested detail fields are only returned when requested."""
+        response = self.get(self.url)
+
+        for field in ['part_detail', 'issued_by_detail', 'responsible_detail']:
+            self.assertNotIn(field, response.data[0])
+
+        response = self.get(
+            self.url,
+            data={
+                'part_detail': True,
+                'issued_by_detail': True,
+                'responsible_detail': True,
+            }
+        )
+
+        for field in ['part_detail', 'issued_by_detail', 'responsible_detail']:
+            self.assertIn(field, response.data[0])
+
     def test_overdue(self):
         """Create a new build, in the past."""
         in_the_past = datetime.now().date() - timedelta(days=50)
@@ -8,6 +8,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
+from django.db.models.signals import post_save
 
 from InvenTree import status_codes as status
 
@@ -452,6 +453,50 @@ class BuildTest(BuildTestBase):
         """
         pass
 
+    def test_create_allocations(self):
+        """Allocations created in bulk still send the post_save signal"""
+
+        saved = []
+
+        def on_save(sender, instance, created, **kwargs):
+            saved.append((instance.pk, created))
+
+        post_save.connect(on_save, sender=BuildItem)
+
+        try:
+            self.build.create_allocations([
+                BuildItem(build=self.build, stock_item=self.stock_1_2, quantity=5),
+                BuildItem(build=self.build, stock_item=self.stock_2_1, quantity=2),
+            ])
+        finally:
+            post_save.disconnect(on_save, sender=BuildItem)
+
+        items = BuildItem.objects.filter(build=self.build)
+
+        self.assertEqual(items.count(), 2)
+        self.assertEqual(sorted(saved), sorted([(item.pk, True) for item in items]))
+
+    def test_cancel_remove_shared_stock(self):
+        """Cancel a build where multiple allocations share the same stock item"""
+
+        # Allocate the same stock items against both outputs
+        for output in [self.output_1, self.output_2]:
+            self.allocate_stock(
+                output,
+                {
+                    self.stock_1_2: 5,
+                    self.stock_3_1: 2,
+                }
+            )
+
+        self.build.cancel_build(None, remove_allocated_stock=True)
+
+        self.assertEqual(BuildItem.objects.filter(build=self.build).count(), 0)
+
+        # Each allocation must have been removed from stock
+        self.assertEqual(StockItem.objects.get(pk=self.stock_1_2.pk).quantity, 90)
+        self.assertEqual(StockItem.objects.get(pk=self.stock_3_1.pk).quantity, 996)
+
     def test_complete(self):
         """Test completion of a build output"""
 
@@ -4,6 +4,7 @@
 - Manages setup and teardown of plugin class instances
 """
 
+import functools
 import imp
 import importlib
 import logging
@@ -11,13 +12,11 @@ import os
 import subprocess
 from importlib import reload
 from pathlib import Path
-from typing import Dict, List, OrderedDict
+from typing import Dict, List
 
 from django.apps import apps
 from django.conf import settings
-from django.contrib import admin
 from django.db.utils import IntegrityError, OperationalError, ProgrammingError
-from django.urls import clear_url_caches, include, re_path
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
@@ -33,6 +32,35 @@ from .plugin import InvenTreePlugin
 logger = logging.getLogger('inventree')
 
 
+@functools.lru_cache(maxsize=None)
+def get_plugin_key(plugin) -> tuple:
+    """Return the name and config key of a plugin class.
+
+    These only depend on class attributes, so they are computed once per class.
+    """
+    # These checks only use attributes - never use plugin supplied functions -> that would lead to arbitrary code execution!!
+    name = plugin.NAME
+    key = slugify(plugin.SLUG if getattr(plugin, 'SLUG', None) else name)  # keys are slugs!
+
+    return name, key
+
+
+@functools.lru_cache(maxsize=None)
+def get_plugin_path(plugin) -> str:
+    """Return the app path of a plugin class.
+
+    The input can be eiter:
+    - a local file / dir
+    - a package
+    """
+    try:
+        # for local path plugins
+        return '.'.join(plugin.file().parent.relative_to(settings.BASE_DIR).parts)
+    except ValueError:  # pragma: no cover
+        # plugin is shipped as package - extract plugin module name
+        return plugin.__module__.split('.')[0]
+
+
 class PluginsRegistry:
     """The PluginsRegistry class."""
 
@@ -56,6 +84,7 @@ class PluginsRegistry:
         self.git_is_modern = True                               # Is a modern version of git available
 
         self.installed_apps = []                                # Holds all added plugin_paths
+        self.url_plugins = set()                                # Slugs of plugins the urls were last built with
 
         # mixins
         self.mixins_settings = {}
@@ -256,7 +285,7 @@ class PluginsRegistry:
 
                         # Add path
                         dirs.append(pd_path)
-                        logger.info(f"Added plugin directory: '{pd}' as '{pd_path}'")
+                        logger.info("Added plugin directory: '%s' as '%s'", pd, pd_path)
 
         return dirs
 
@@ -268,7 +297,7 @@ class PluginsRegistry:
         # Collect plugins from paths
         for plugin in self.plugin_dirs():
 
-            logger.info(f"Loading plugins from directory '{plugin}'")
+            logger.info("Loading plugins from directory '%s'", plugin)
 
             parent_path = None
             parent_obj = Path(plugin)
@@ -287,7 +316,7 @@ class PluginsRegistry:
             modules = get_plugins(raw_module, InvenTreePlugin, path=parent_path)
 
             if modules:
-                [collected_plugins.append(item) for item in modules]
+                collected_plugins.extend(modules)
 
         # From this point any plugins are considered "external" and only loaded if plugins are explicitly enabled
         if settings.PLUGINS_ENABLED:
@@ -305,8 +334,10 @@ class PluginsRegistry:
                         handle_error(error, do_raise=False, log_name='discovery')
 
         # Log collected plugins
-        logger.info(f'Collected {len(collected_plugins)} plugins!')
-        logger.info(", ".join([a.__module__ for a in collected_plugins]))
+        logger.info('Collected %s plugins!', len(collected_plugins))
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(", ".join([a.__module__ for a in collected_plugins]))
 
         return collected_plugins
 
@@ -325,7 +356,7 @@ class PluginsRegistry:
             # System most likely does not have 'git' installed
             return False
 
-        logger.info(f'plugin requirements were run\n{output}')
+        logger.info('plugin requirements were run\n%s', output)
 
         # do not run again
         settings.PLUGIN_FILE_CHECKED = True
@@ -385,22 +416,37 @@ class PluginsRegistry:
 
         logger.info('Starting plugin initialisation')
 
+        plugin_keys = [(plg, *get_plugin_key(plg)) for plg in self.plugin_modules]
+
+        # Fetch the config entries for all plugins at once, and create any missing entries in bulk
+        try:
+            plugin_configs = PluginConfig.objects.in_bulk([plg_key for _plg, _name, plg_key in plugin_keys], field_name='key')
+
+            missing = {plg_key: plg_name for _plg, plg_name, plg_key in plugin_keys if plg_key not in plugin_configs}
+
+            if missing:
+                PluginConfig.objects.bulk_create(
+                    [PluginConfig(key=plg_key, name=plg_name) for plg_key, plg_name in missing.items()],
+                    ignore_conflicts=True,
+                )
+                plugin_configs.update(PluginConfig.objects.in_bulk(list(missing.keys()), field_name='key'))
+        except (OperationalError, ProgrammingError) as error:
+            # Exception if the database has not been migrated yet - check if test are running - raise if not
+            if not settings.PLUGIN_TESTING:
+                raise error  # pragma: no cover
+            plugin_configs = None
+
         # Initialize plugins
-        for plg in self.plugin_modules:
-            # These checks only use attributes - never use plugin supplied functions -> that would lead to arbitrary code execution!!
-            plg_name = plg.NAME
-            plg_key = slugify(plg.SLUG if getattr(plg, 'SLUG', None) else plg_name)  # keys are slugs!
+        for plg, plg_name, plg_key in plugin_keys:
+            plg_db = plugin_configs.get(plg_key, None) if plugin_configs is not None else None
 
-            try:
-                plg_db, _created = PluginConfig.objects.get_or_create(key=plg_key, name=plg_name)
-            except (OperationalError, ProgrammingError) as error:
-                # Exception if the database has not been migrated yet - check if test are running - raise if not
-                if not settings.PLUGIN_TESTING:
-                    raise error  # pragma: no cover
-                plg_db = None
-            except (IntegrityError) as error:  # pragma: no cover
-                logger.error(f"Error initializing plugin `{plg_name}`: {error}")
-                handle_error(error, log_name='init')
+            if plugin_configs is not None and (plg_db is None or plg_db.name != plg_name):
+                # Entry does not match this plugin - fall back to a lookup for this plugin only
+                try:
+                    plg_db, _created = PluginConfig.objects.get_or_create(key=plg_key, name=plg_name)
+                except (IntegrityError) as error:  # pragma: no cover
+                    logger.error(f"Error initializing plugin `{plg_name}`: {error}")
+                    handle_error(error, log_name='init')
 
             # Append reference to plugin
             plg.db = plg_db
@@ -424,10 +470,10 @@ class PluginsRegistry:
                     continue  # continue -> the plugin is not loaded
 
                 # Initialize package - we can be sure that an admin has activated the plugin
-                logger.info(f'Loading plugin `{plg_name}`')
+                logger.info('Loading plugin `%s`', plg_name)
                 try:
                     plg_i: InvenTreePlugin = plg()
-                    logger.info(f'Loaded plugin `{plg_name}`')
+                    logger.info('Loaded plugin `%s`', plg_name)
                 except Exception as error:
                     handle_error(error, log_name='init')  # log error and raise it -> disable plugin
 
@@ -460,14 +506,22 @@ class PluginsRegistry:
             force_reload (bool, optional): Also reload base apps. Defaults to False.
             full_reload (bool, optional): Reload everything - including plugin mechanism. Defaults to False.
         """
-        # activate integrations
-        plugins = self.plugins.items()
-        logger.info(f'Found {len(plugins)} active plugins')
+        # activate integrations - take a snapshot, as activating apps can trigger changes to the registry
+        plugins = tuple(self.plugins.items())
+        logger.info('Found %s active plugins', len(plugins))
+
+        # Group the plugins by enabled mixin, so each activation step only visits the relevant plugins
+        plugins_by_mixin = {}
+
+        for slug, plugin in plugins:
+            for mixin in ['settings', 'schedule', 'app', 'urls']:
+                if plugin.mixin_enabled(mixin):
+                    plugins_by_mixin.setdefault(mixin, []).append((slug, plugin))
 
-        self.activate_plugin_settings(plugins)
-        self.activate_plugin_schedule(plugins)
-        self.activate_plugin_app(plugins, force_reload=force_reload, full_reload=full_reload)
-        self.activate_plugin_url(plugins, force_reload=force_reload, full_reload=full_reload)
+        self.activate_plugin_settings(plugins_by_mixin.get('settings', []))
+        self.activate_plugin_schedule(plugins_by_mixin.get('schedule', []))
+        self.activate_plugin_app(plugins_by_mixin.get('app', []), force_reload=force_reload, full_reload=full_reload)
+        self.activate_plugin_url(plugins_by_mixin.get('urls', []), force_reload=force_reload, full_reload=full_reload)
 
     def _deactivate_plugins(self):
         """Run deactivation functions for all plugins."""
@@ -482,15 +536,17 @@ class PluginsRegistry:
 
         Add all defined settings form the plugins to a unified dict in the registry.
         This dict is referenced by the PluginSettings for settings definitions.
+
+        Args:
+            plugins (list): (slug, plugin) pairs of plugins with the SettingsMixin enabled
         """
         logger.info('Activating plugin settings')
 
         self.mixins_settings = {}
 
         for slug, plugin in plugins:
-            if plugin.mixin_enabled('settings'):
-                plugin_setting = plugin.settings
-                self.mixins_settings[slug] = plugin_setting
+            plugin_setting = plugin.settings
+            self.mixins_settings[slug] = plugin_setting
 
     def deactivate_plugin_settings(self):
         """Deactivate all plugin settings."""
@@ -499,7 +555,11 @@ class PluginsRegistry:
         self.mixins_settings = {}
 
     def activate_plugin_schedule(self, plugins):
-        """Activate scheudles from plugins with the ScheduleMixin."""
+        """Activate scheudles from plugins with the ScheduleMixin.
+
+        Args:
+            plugins (list): (slug, plugin) pairs of plugins with the ScheduleMixin enabled
+        """
         logger.info('Activating plugin tasks')
 
         from common.models import InvenTreeSetting
@@ -511,32 +571,27 @@ class PluginsRegistry:
 
             for _key, plugin in plugins:
 
-                if plugin.mixin_enabled('schedule'):
-
-                    if plugin.is_active():
-                        # Only active tasks for plugins which are enabled
-                        plugin.register_tasks()
-                        task_keys += plugin.get_task_names()
+                if plugin.is_active():
+                    # Only active tasks for plugins which are enabled
+                    plugin.register_tasks()
+                    task_keys += plugin.get_task_names()
 
         if len(task_keys) > 0:
-            logger.info(f"Activated {len(task_keys)} scheduled tasks")
+            logger.info("Activated %s scheduled tasks", len(task_keys))
 
         # Remove any scheduled tasks which do not match
         # This stops 'old' plugin tasks from accumulating
         try:
             from django_q.models import Schedule
 
-            scheduled_plugin_tasks = Schedule.objects.filter(name__istartswith="plugin.")
-
-            deleted_count = 0
-
-            for task in scheduled_plugin_tasks:
-                if task.name not in task_keys:
-                    task.delete()
-                    deleted_count += 1
+            deleted_count, _deleted = Schedule.objects.filter(
+                name__istartswith="plugin."
+            ).exclude(
+                name__in=task_keys
+            ).delete()
 
             if deleted_count > 0:
-                logger.info(f"Removed {deleted_count} old scheduled tasks")  # pragma: no cover
+                logger.info("Removed %s old scheduled tasks", deleted_count)  # pragma: no cover
         except (ProgrammingError, OperationalError):
             # Database might not yet be ready
             logger.warning("activate_integration_schedule failed, database not ready")
@@ -552,7 +607,7 @@ class PluginsRegistry:
         """Activate AppMixin plugins - add custom apps and reload.
 
         Args:
-            plugins (dict): List of IntegrationPlugins that should be installed
+            plugins (list): (slug, plugin) pairs of plugins with the AppMixin enabled
             force_reload (bool, optional): Only reload base apps. Defaults to False.
             full_reload (bool, optional): Reload everything - including plugin mechanism. Defaults to False.
         """
@@ -561,15 +616,16 @@ class PluginsRegistry:
         if settings.PLUGIN_TESTING or InvenTreeSetting.get_setting('ENABLE_PLUGINS_APP'):
             logger.info('Registering IntegrationPlugin apps')
             apps_changed = False
+            installed_apps = set(settings.INSTALLED_APPS)
 
             # add them to the INSTALLED_APPS
             for _key, plugin in plugins:
-                if plugin.mixin_enabled('app'):
-                    plugin_path = self._get_plugin_path(plugin)
-                    if plugin_path not in settings.INSTALLED_APPS:
-                        settings.INSTALLED_APPS += [plugin_path]
-                        self.installed_apps += [plugin_path]
-                        apps_changed = True
+                plugin_path = self._get_plugin_path(plugin)
+                if plugin_path not in installed_apps:
+                    settings.INSTALLED_APPS += [plugin_path]
+                    self.installed_apps += [plugin_path]
+                    installed_apps.add(plugin_path)
+                    apps_changed = True
             # if apps were changed or force loading base apps -> reload
             if apps_changed or force_reload:
                 # first startup or force loading of base apps -> registry is prob false
@@ -589,18 +645,15 @@ class PluginsRegistry:
         """Activate UrlsMixin plugins - add custom urls .
 
         Args:
-            plugins (dict): List of IntegrationPlugins that should be installed
+            plugins (list): (slug, plugin) pairs of plugins with the UrlsMixin enabled
             force_reload (bool, optional): Only reload base apps. Defaults to False.
             full_reload (bool, optional): Reload everything - including plugin mechanism. Defaults to False.
         """
         from common.models import InvenTreeSetting
         if settings.PLUGIN_TESTING or InvenTreeSetting.get_setting('ENABLE_PLUGINS_URL'):
             logger.info('Registering UrlsMixin Plugin')
-            urls_changed = False
-            # check whether an activated plugin extends UrlsMixin
-            for _key, plugin in plugins:
-                if plugin.mixin_enabled('urls'):
-                    urls_changed = True
+            # check whether the plugins providing urls changed since the urls were last built
+            urls_changed = {slug for slug, _plugin in plugins} != self.url_plugins
             # if apps were changed or force loading base apps -> reload
             if urls_changed or force_reload or full_reload:
                 # update urls - must be last as models must be registered for creating admin routes
@@ -612,13 +665,15 @@ class PluginsRegistry:
         This is needed if plugins were loaded earlier and then reloaded as models and admins rely on imports.
         Those register models and admin in their respective objects (e.g. admin.site for admin).
         """
+        from django.contrib import admin
+
         for plugin_path in self.installed_apps:
             try:
                 app_name = plugin_path.split('.')[-1]
                 app_config = apps.get_app_config(app_name)
             except LookupError:  # pragma: no cover
                 # the plugin was never loaded correctly
-                logger.debug(f'{app_name} App was not found during deregistering')
+                logger.debug('%s App was not found during deregistering', app_name)
                 break
 
             # reload models if they were set
@@ -627,11 +682,8 @@ class PluginsRegistry:
             if app_config.models_module and len(app_config.models) == 0:
                 reload(app_config.models_module)
 
-            # check for all models if they are registered with the site admin
-            model_not_reg = False
-            for model in app_config.get_models():
-                if not admin.site.is_registered(model):
-                    model_not_reg = True
+            # check if any model is not registered with the site admin
+            model_not_reg = any(not admin.site.is_registered(model) for model in app_config.get_models())
 
             # reload admin if at least one model is not registered
             # models are registered with admin in the 'admin.py' file - so we check
@@ -642,20 +694,14 @@ class PluginsRegistry:
     def _get_plugin_path(self, plugin):
         """Parse plugin path.
 
-        The input can be eiter:
-        - a local file / dir
-        - a package
+        The path only depends on the plugin class, so it is computed once per class.
         """
-        try:
-            # for local path plugins
-            plugin_path = '.'.join(plugin.path().relative_to(settings.BASE_DIR).parts)
-        except ValueError:  # pragma: no cover
-            # plugin is shipped as package - extract plugin module name
-            plugin_path = plugin.__module__.split('.')[0]
-        return plugin_path
+        return get_plugin_path(plugin.__class__)
 
     def deactivate_plugin_app(self):
         """Deactivate AppMixin plugins - some magic required."""
+        from django.contrib import admin
+
         # unregister models from admin
         for plugin_path in self.installed_apps:
             models = []  # the modelrefs need to be collected as poping an item in a iter is not welcomed
@@ -673,7 +719,7 @@ class PluginsRegistry:
                     models += [model._meta.model_name]
             except LookupError:  # pragma: no cover
                 # if an error occurs the app was never loaded right -> so nothing to do anymore
-                logger.debug(f'{app_name} App was not found during deregistering')
+                logger.debug('%s App was not found during deregistering', app_name)
                 break
 
             # unregister the models (yes, models are just kept in multilevel dicts)
@@ -698,9 +744,10 @@ class PluginsRegistry:
         self._update_urls()
 
     def _clean_installed_apps(self):
-        for plugin in self.installed_apps:
-            if plugin in settings.INSTALLED_APPS:
-                settings.INSTALLED_APPS.remove(plugin)
+        installed_apps = set(self.installed_apps)
+
+        # Modify the list in place, as references to it might be held elsewhere
+        settings.INSTALLED_APPS[:] = [app for app in settings.INSTALLED_APPS if app not in installed_apps]
 
         self.installed_apps = []
 
@@ -711,10 +758,15 @@ class PluginsRegistry:
         self.plugins_full: Dict[str, InvenTreePlugin] = {}
 
     def _update_urls(self):
+        from django.contrib import admin
+        from django.urls import clear_url_caches, include, re_path
+
         from InvenTree.urls import frontendpatterns as urlpattern
         from InvenTree.urls import urlpatterns as global_pattern
         from plugin.urls import get_plugin_urls
 
+        self.url_plugins = {slug for slug, plugin in self.plugins.items() if plugin.mixin_enabled('urls')}
+
         for index, url in enumerate(urlpattern):
             if hasattr(url, 'app_name'):
                 if url.app_name == 'admin':
@@ -738,7 +790,7 @@ class PluginsRegistry:
             self.is_loading = True  # set flag to disable loop reloading
         if force_reload:
             # we can not use the built in functions as we need to brute force the registry
-            apps.app_configs = OrderedDict()
+            apps.app_configs = {}
             apps.apps_ready = apps.models_ready = apps.loading = apps.ready = False
             apps.clear_cache()
             self._try_reload(apps.populate, settings.INSTALLED_APPS)
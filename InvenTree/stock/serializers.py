@@ -1,17 +1,15 @@
 """JSON serializers for Stock app."""
 
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import BooleanField, Case, Q, Value, When
-from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
-from sql_util.utils import SubqueryCount, SubquerySum
+from sql_util.utils import SubqueryCount
 
 import common.models
 import company.models
@@ -115,11 +113,7 @@ class StockItemSerializer(InvenTree.serializers.InvenTreeModelSerializer):
 
         # Annotate the queryset with the total allocated to sales orders
         queryset = queryset.annotate(
-            allocated=Coalesce(
-                SubquerySum('sales_order_allocations__quantity'), Decimal(0)
-            ) + Coalesce(
-                SubquerySum('allocations__quantity'), Decimal(0)
-            )
+            allocated=stock.filters.annotate_allocated_quantity()
         )
 
         # Annotate the queryset with the number of tracking items
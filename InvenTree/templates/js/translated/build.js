@@ -2456,6 +2456,8 @@ function loadBuildTable(table, options) {
     var filters = {};
 
     params['part_detail'] = true;
+    params['issued_by_detail'] = true;
+    params['responsible_detail'] = true;
 
     if (!options.disableFilters) {
         filters = loadTableFilters('build');